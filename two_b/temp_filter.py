@@ -0,0 +1,244 @@
+"""
+    Signal conditioning for DS18B20 temperature readings
+"""
+
+#
+#   Sits between read_temp() and the consumers (high / low values and graph).
+#   Stages, in order:
+#      1    Reject sensor sentinel values (85.000 power-on reset, -127 / 0 bus errors)
+#      2    Apply per sensor calibration (gain and offset)
+#      3    Reject physically impossible jumps between two samples
+#      4    Smooth with a running median or exponential filter
+#
+#   Each stage keeps its own state and costs O(1) per sample through update().
+#   A rejected sample is returned as None and is not passed to the next stage.
+#   process() runs the same stage over a stored history using NumPy, rejected
+#   samples are returned as NaN. NumPy is only needed for process().
+#
+import math
+from collections import deque
+
+SENTINELS = (85.0, -127.0, 0.0)                     # DS18B20 reset value and bus error values
+CALIBRATION = {}                                    # Sensor id '28-xxxxx' : (offset, gain)
+
+
+def _numpy():
+    """
+        Import NumPy only when a batch is processed, not needed on the Pi itself
+    """
+    import numpy as np
+    return np
+
+
+class SentinelReject:
+    """
+        Drop raw readings equal to a known sensor error value
+    """
+    def __init__(self, sentinels=SENTINELS, tolerance=0.0005):
+        self.sentinels = tuple(sentinels)
+        self.tolerance = tolerance
+
+    def update(self, temp):
+        if temp is None:
+            return None
+        for value in self.sentinels:
+            if abs(temp - value) <= self.tolerance:
+                return None
+        return temp
+
+    def reset(self):
+        pass
+
+    def process(self, temps):
+        np = _numpy()
+        temps = np.asarray(temps, dtype=float).copy()
+        for value in self.sentinels:
+            temps[np.abs(temps - value) <= self.tolerance] = np.nan
+        return temps
+
+
+class Calibration:
+    """
+        Correct a reading with gain and offset: temp * gain + offset
+    """
+    def __init__(self, offset=0.0, gain=1.0):
+        self.offset = offset
+        self.gain = gain
+
+    @classmethod
+    def for_sensor(cls, sensor_id, table=None):
+        """
+            Look up calibration for a sensor id, no correction if not listed
+        """
+        if table is None:
+            table = CALIBRATION
+        offset, gain = table.get(sensor_id, (0.0, 1.0))
+        return cls(offset, gain)
+
+    def update(self, temp):
+        if temp is None:
+            return None
+        return temp * self.gain + self.offset
+
+    def reset(self):
+        pass
+
+    def process(self, temps):
+        np = _numpy()
+        return np.asarray(temps, dtype=float) * self.gain + self.offset
+
+
+class JumpReject:
+    """
+        Drop a reading that differs more than max_step from the last accepted one
+        After max_rejects rejections in a row the reading is accepted as the new level,
+        so a real change of temperature can not lock out the sensor.
+    """
+    def __init__(self, max_step=5.0, max_rejects=5):
+        self.max_step = max_step
+        self.max_rejects = max_rejects
+        self.last = None
+        self.rejects = 0
+
+    def update(self, temp):
+        if temp is None:
+            return None
+        if self.last is not None and abs(temp - self.last) > self.max_step:
+            self.rejects += 1
+            if self.rejects <= self.max_rejects:
+                return None
+        self.last = temp
+        self.rejects = 0
+        return temp
+
+    def reset(self):
+        self.last = None
+        self.rejects = 0
+
+    def process(self, temps):
+        np = _numpy()
+        temps = np.asarray(temps, dtype=float)
+        out = np.full(temps.shape, np.nan)
+        state = JumpReject(self.max_step, self.max_rejects)    # Each jump depends on last accepted
+        for i in np.flatnonzero(~np.isnan(temps)):
+            value = state.update(float(temps[i]))
+            if value is not None:
+                out[i] = value
+        return out
+
+
+class MedianFilter:
+    """
+        Running median over the last window accepted readings
+    """
+    def __init__(self, window=5):
+        self.window = window
+        self.buffer = deque(maxlen=window)
+
+    def update(self, temp):
+        if temp is None:
+            return None
+        self.buffer.append(temp)
+        values = sorted(self.buffer)
+        mid = len(values) // 2
+        if len(values) % 2:
+            return values[mid]
+        return (values[mid - 1] + values[mid]) / 2
+
+    def reset(self):
+        self.buffer.clear()
+
+    def process(self, temps):
+        np = _numpy()
+        temps = np.asarray(temps, dtype=float)
+        out = np.full(temps.shape, np.nan)
+        valid = np.flatnonzero(~np.isnan(temps))
+        values = temps[valid]
+        smooth = np.empty(values.shape)
+        head = min(self.window - 1, len(values))
+        for i in range(head):                              # Window not yet filled
+            smooth[i] = np.median(values[:i + 1])
+        if len(values) >= self.window:
+            windows = np.lib.stride_tricks.sliding_window_view(values, self.window)
+            smooth[self.window - 1:] = np.median(windows, axis=1)
+        out[valid] = smooth
+        return out
+
+
+class ExponentialFilter:
+    """
+        Exponential moving average, alpha is the weight of the newest reading
+    """
+    def __init__(self, alpha=0.3):
+        self.alpha = alpha
+        self.value = None
+
+    def update(self, temp):
+        if temp is None:
+            return None
+        if self.value is None:
+            self.value = temp
+        else:
+            self.value += self.alpha * (temp - self.value)
+        return self.value
+
+    def reset(self):
+        self.value = None
+
+    def process(self, temps):
+        np = _numpy()
+        temps = np.asarray(temps, dtype=float)
+        out = np.full(temps.shape, np.nan)
+        value = None
+        for i in np.flatnonzero(~np.isnan(temps)):          # Recursive filter, one pass
+            if value is None:
+                value = temps[i]
+            else:
+                value += self.alpha * (temps[i] - value)
+            out[i] = value
+        return out
+
+
+class Conditioner:
+    """
+        Chain of stages, a reading rejected by one stage skips the rest
+    """
+    def __init__(self, stages):
+        self.stages = list(stages)
+
+    @classmethod
+    def for_sensor(cls, sensor_id, smoothing='median'):
+        """
+            Default chain for a DS18B20, smoothing 'median', 'ema' or None
+        """
+        stages = [SentinelReject(), Calibration.for_sensor(sensor_id), JumpReject()]
+        if smoothing == 'median':
+            stages.append(MedianFilter())
+        elif smoothing == 'ema':
+            stages.append(ExponentialFilter())
+        elif smoothing is not None:
+            raise ValueError("Unknown smoothing: " + str(smoothing))
+        return cls(stages)
+
+    def update(self, temp):
+        if temp is None or math.isnan(temp):
+            return None
+        for stage in self.stages:
+            temp = stage.update(temp)
+            if temp is None:
+                return None
+        return temp
+
+    def reset(self):
+        for stage in self.stages:
+            stage.reset()
+
+    def process(self, temps):
+        """
+            Reprocess stored history, independent of the running state
+        """
+        np = _numpy()
+        temps = np.asarray(temps, dtype=float)
+        for stage in self.stages:
+            temps = stage.process(temps)
+        return temps
@@ -22,6 +22,8 @@ from threading import Thread, Event
 
 import RPi.GPIO as GPIO
 
+from temp_filter import Conditioner
+
 BASE_DIR = '/sys/bus/w1/devices/'
 try:
     device_folder = glob.glob(BASE_DIR + '28*')[0]
@@ -30,6 +32,7 @@ except IndexError:                                      # No folder 28-xxxxx fou
     print ("Program stopped")
     sys.exit(1)                                         # Force fixed_script end with return code 1
 device_file = device_folder + '/w1_slave'
+sensor_id = device_folder.split('/')[-1]          # 28-xxxxx, key for calibration table
 
 GPIO.setmode(GPIO.BCM)
 GPIO.setup(18, GPIO.OUT)
@@ -184,26 +187,29 @@ def main():
     time_hrs = timestr[0:2]
     time_min = timestr[2:4]
     time_sec = timestr[4:6]
+    conditioner = Conditioner.for_sensor(sensor_id)          # Reject, calibrate and smooth readings
     count = 0
     time_t = 0
     temp_high = 0.00
     temp_low = 40.00
-    temp = 0.00
+    temp = None
     starttime = timestr
     start_time=time.perf_counter()
     print ("Temperature fixed_script started at:", starttime, time_t)
     try:
         while True:
             if int(time_sec) == time_t:
-                temp = read_temp()
+                sample = conditioner.update(read_temp())
+                if sample is not None:                                  # None when sample is rejected
+                    temp = sample
 #                print(timestr, time_t, temp, count, buf_cnt)        # Removed line for debug purposes only
-                if int(temp*1000) > int(temp_high*1000):
-                    temp_high = temp
-                if int(temp*1000) < int(temp_low*1000):
-                    temp_low = temp
-                txt.clear()                                          # Clear text fixed_screen
-                fixed_text()                                         # Update with fixed text
-                txt_values(temp_high, temp_low, temp)                # Update with variable data
+                    if int(temp*1000) > int(temp_high*1000):
+                        temp_high = temp
+                    if int(temp*1000) < int(temp_low*1000):
+                        temp_low = temp
+                    txt.clear()                                          # Clear text fixed_screen
+                    fixed_text()                                         # Update with fixed text
+                    txt_values(temp_high, temp_low, temp)                # Update with variable data
                 time_t +=3
                 count +=1
                 buf_cnt+=1
@@ -223,12 +229,12 @@ def main():
                     fixed_scr_hrs = timestr[0:2]
                     fixed_scr_min = timestr[2:4]
                     x = -480 + int(((int(fixed_scr_hrs)*60 + int(fixed_scr_min))/60)*40)
-                    y = round(float(temp),0)
                     if x== -480:                                   # Re-draw fixed_screen at 00:00 hrs
                         fixed_scr.clear()
                         fixed_scr_layout()
                         fixed_scr.fixed_screen.update()
-                    fixed_scr_dot(x, y)
+                    if temp is not None:                       # No accepted sample yet
+                        fixed_scr_dot(x, round(float(temp),0))
             timestr = datetime.datetime.now().strftime ("%H%M%S")
             time_sec = timestr[4:6]
 